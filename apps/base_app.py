@@ -1,15 +1,70 @@
+import sys
 import traceback
-from typing import Any, Iterable
+from typing import Any, Iterable, Mapping
 
 from appdaemon.plugins.hass.hassapi import Hass, hass_check
 import appdaemon.utils
 
+from error_reporting import (
+    CircuitBreaker,
+    exception_reporter,
+    fingerprint,
+    ha_circuit_breaker,
+    ha_connection,
+)
 from light_setting import LightSetting
 
 
 class BaseApp(Hass):
     def notify_exception(self) -> None:
-        self.notify("Encountered the following exception: \n" + traceback.format_exc())
+        _, exception, _ = sys.exc_info()
+        assert exception is not None, "Must be called while handling an exception."
+
+        suppressed = exception_reporter.should_report(fingerprint(exception))
+        if suppressed is None:
+            return
+
+        message = "Encountered the following exception: \n" + traceback.format_exc()
+        if suppressed > 0:
+            message += (
+                f"\n{suppressed} identical exceptions were suppressed "
+                "since this was last reported."
+            )
+
+        self.notify(message)
+
+    def ha_available(self) -> bool:
+        """
+        Whether HA calls should be attempted, or skipped because AppDaemon has
+        lost its connection to HA. Service calls and state updates can't tell
+        us themselves, since AppDaemon logs and swallows HA failures.
+        """
+        was_closed = ha_circuit_breaker.state == CircuitBreaker.State.CLOSED
+        available = ha_circuit_breaker.allow_request(lambda: ha_connection.connected)
+        if available and not was_closed:
+            self.log("Reconnected to HA, resuming.")
+
+        return available
+
+    def listen_ha_connection(self) -> None:
+        """
+        Trips the circuit breaker as soon as AppDaemon loses its connection to
+        HA, and tracks when it reconnects for the breaker's probes
+        """
+        self.listen_event(self._ha_disconnected, "plugin_stopped")
+        self.listen_event(self._ha_connected, "plugin_started")
+
+    def _ha_disconnected(
+        self, event_name: str, data: dict[str, Any], kwargs: dict[str, Any]
+    ) -> None:
+        ha_connection.connected = False
+        if ha_circuit_breaker.trip():
+            self.log("Lost connection to HA, pausing.", level="WARNING")
+
+    def _ha_connected(
+        self, event_name: str, data: dict[str, Any], kwargs: dict[str, Any]
+    ) -> None:
+        ha_connection.connected = True
 
     def set_light(self, entity_id: str, setting: LightSetting) -> None:
         if setting.brightness == 0:
@@ -20,3 +75,27 @@ class BaseApp(Hass):
                 brightness_pct=setting.brightness,
                 kelvin=setting.color_temperature,
             )
+
+    def create_scene(self, scene_id: str, settings: Mapping[str, LightSetting]) -> None:
+        def scene_state(setting: LightSetting) -> dict[str, Any]:
+            if setting.brightness == 0:
+                return {"state": "off"}
+            else:
+                return {
+                    "state": "on",
+                    "brightness": round(setting.brightness * 255 / 100),
+                    "color_mode": "color_temp",
+                    "color_temp": round(1_000_000 / setting.color_temperature),
+                }
+
+        self.call_service(
+            "scene/create",
+            scene_id=scene_id,
+            entities={
+                entity_id: scene_state(setting)
+                for entity_id, setting in settings.items()
+            },
+        )
+
+    def activate_scene(self, entity_id: str) -> None:
+        self.turn_on(entity_id=entity_id)
@@ -77,10 +77,30 @@ brightness_curve = pchip(time_values, brightness_values)
 color_temperature_curve = pchip(time_values, color_temperature_values)
 
 
-def current_curve_setting(app: Hass) -> LightSetting:
-    minutes_since_midnight = time_to_minutes_since_midnight(app.time())
+# Evaluate the curves once for every minute of the day, since that's the
+# resolution they get sampled at anyway
+
+minutes_of_day = np.arange(24 * 60)
 
-    return LightSetting(
-        brightness=int(brightness_curve(minutes_since_midnight)),
-        color_temperature=int(color_temperature_curve(minutes_since_midnight)),
+curve_table = [
+    LightSetting(brightness=int(brightness), color_temperature=int(color_temperature))
+    for brightness, color_temperature in zip(
+        brightness_curve(minutes_of_day), color_temperature_curve(minutes_of_day)
     )
+]
+
+
+def curve_setting(minutes_since_midnight: int) -> LightSetting:
+    return curve_table[minutes_since_midnight]
+
+
+def current_curve_setting(app: Hass) -> LightSetting:
+    return curve_setting(time_to_minutes_since_midnight(app.time()))
+
+
+def all_curve_settings() -> set[LightSetting]:
+    """
+    Every distinct setting the curve produces over the course of a day,
+    at the same minutely resolution it gets sampled at
+    """
+    return set(curve_table)
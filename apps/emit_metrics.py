@@ -2,25 +2,59 @@ from __future__ import annotations
 
 from datetime import time
 import functools
-from typing import Any
+from typing import Any, Optional
 
 from base_app import BaseApp
 from curve import current_curve_setting
 from metrics import Metric
+from metrics_history import metrics_registry
 from light_setting import LightSetting
 from lights import Room, home
 
 
 class EmitMetrics(BaseApp):
     def initialize(self) -> None:
-        self.run_minutely(self._default_brightness().mk_update(self), time(second=30))
+        self.listen_ha_connection()
+
+        push_to_ha: bool = self.args.get("push_to_ha", True)
+
+        self.run_minutely(
+            self._default_brightness().mk_update(self, push_to_ha), time(second=30)
+        )
 
         for room in home.rooms:
             self.run_minutely(
-                self._room_brightness(room).mk_update(self), time(second=30)
+                self._room_brightness(room).mk_update(self, push_to_ha),
+                time(second=30),
             )
 
-        self.run_minutely(self._color_temperature().mk_update(self), time(second=30))
+        self.run_minutely(
+            self._color_temperature().mk_update(self, push_to_ha), time(second=30)
+        )
+
+        self._prometheus_path: Optional[str] = self.args.get("prometheus_path")
+        if self._prometheus_path is not None:
+            self.run_minutely(self.export_prometheus, time(second=45))
+
+        prometheus_port: Optional[int] = self.args.get("prometheus_port")
+        self._prometheus_server = (
+            metrics_registry.serve_prometheus(prometheus_port)
+            if prometheus_port is not None
+            else None
+        )
+
+    def terminate(self) -> None:
+        if self._prometheus_server is not None:
+            self._prometheus_server.shutdown()
+            self._prometheus_server.server_close()
+
+    def export_prometheus(self, kwargs: dict[str, Any]) -> None:
+        try:
+            assert self._prometheus_path is not None
+            metrics_registry.write_prometheus(self._prometheus_path)
+        except:
+            self.notify_exception()
+            raise
 
     def _default_brightness(self) -> Metric:
         def calculate() -> Metric.Value:
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from enum import Enum, auto, unique
+import hashlib
+import threading
+import time
+import traceback
+from typing import Callable, Optional
+
+
+def fingerprint(exception: BaseException) -> str:
+    """
+    Identifies an exception by its type and where it was raised. The message
+    is ignored so that e.g. the same timeout against different entities counts
+    as a single failure.
+    """
+    frames = traceback.extract_tb(exception.__traceback__)
+    key = "|".join(
+        [type(exception).__qualname__]
+        + [f"{frame.filename}:{frame.name}:{frame.lineno}" for frame in frames]
+    )
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+@dataclass
+class ExceptionReporter:
+    """
+    Deduplicates exception notifications so each distinct failure is reported
+    at most once per window
+    """
+
+    window_seconds: float
+    clock: Callable[[], float] = time.monotonic
+
+    _last_reported: dict[str, float] = field(default_factory=dict)
+    _suppressed: dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def should_report(self, fingerprint: str) -> Optional[int]:
+        """
+        Returns None if the exception should not be reported, otherwise the
+        number of identical exceptions suppressed since it was last reported
+        """
+        now = self.clock()
+
+        with self._lock:
+            last_reported = self._last_reported.get(fingerprint)
+            if last_reported is not None and now - last_reported < self.window_seconds:
+                self._suppressed[fingerprint] = self._suppressed.get(fingerprint, 0) + 1
+                return None
+
+            self._last_reported[fingerprint] = now
+            return self._suppressed.pop(fingerprint, 0)
+
+
+@dataclass
+class CircuitBreaker:
+    """
+    Stops calls to a dependency once it's known to be unavailable, then
+    periodically probes whether it has recovered. Each failed probe doubles
+    the wait before the next one.
+    """
+
+    initial_backoff_seconds: float
+    max_backoff_seconds: float
+    clock: Callable[[], float] = time.monotonic
+
+    @unique
+    class State(Enum):
+        CLOSED = auto()
+        OPEN = auto()
+        HALF_OPEN = auto()
+
+    _state: CircuitBreaker.State = State.CLOSED
+    _backoff_seconds: float = 0
+    _opened_at: float = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def state(self) -> CircuitBreaker.State:
+        return self._state
+
+    @property
+    def backoff_seconds(self) -> float:
+        return self._backoff_seconds
+
+    def trip(self) -> bool:
+        """
+        Opens the circuit, restarting the current backoff. Returns whether the
+        circuit was previously closed.
+        """
+        with self._lock:
+            was_closed = self._state == CircuitBreaker.State.CLOSED
+            self._open(self._backoff_seconds or self.initial_backoff_seconds)
+            return was_closed
+
+    def allow_request(self, healthy: Callable[[], bool]) -> bool:
+        """
+        Whether calls should go ahead. Once the backoff has elapsed, `healthy`
+        is called as the half-open probe and its result is recorded straight
+        away, so the circuit can never be left half open.
+        """
+        with self._lock:
+            if self._state == CircuitBreaker.State.CLOSED:
+                return True
+
+            # Another caller is already probing
+            if self._state == CircuitBreaker.State.HALF_OPEN:
+                return False
+
+            if self.clock() - self._opened_at < self._backoff_seconds:
+                return False
+
+            self._state = CircuitBreaker.State.HALF_OPEN
+
+        recovered = False
+        try:
+            recovered = healthy()
+        finally:
+            with self._lock:
+                if recovered:
+                    self._state = CircuitBreaker.State.CLOSED
+                    self._backoff_seconds = 0
+                else:
+                    self._open(min(self._backoff_seconds * 2, self.max_backoff_seconds))
+
+        return recovered
+
+    def _open(self, backoff_seconds: float) -> None:
+        self._state = CircuitBreaker.State.OPEN
+        self._backoff_seconds = backoff_seconds
+        self._opened_at = self.clock()
+
+
+@dataclass
+class ConnectionState:
+    """
+    Whether a connection is currently up, as last reported by its
+    connect/disconnect events
+    """
+
+    connected: bool = True
+
+
+# Global modules are only loaded once, so these are shared by every app
+
+exception_reporter = ExceptionReporter(window_seconds=60 * 60)
+
+ha_connection = ConnectionState()
+
+ha_circuit_breaker = CircuitBreaker(
+    initial_backoff_seconds=60,
+    max_backoff_seconds=60 * 60,
+)
@@ -1,29 +1,96 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import ClassVar, Optional
+from typing import Any, ClassVar
 
 
-@dataclass(frozen=True)
 class LightSetting:
+    """
+    An immutable (brightness, color temperature) pair.
+
+    Settings are interned: constructing a setting equal to an existing one
+    returns the existing instance, so each distinct setting is only validated
+    and allocated once. Each setting is also packed into a single int, which
+    is what equality and hashing use, and which is suitable as a cache key or
+    for storage (see `from_packed`).
+    """
+
+    __slots__ = ("brightness", "color_temperature", "packed")
+
     brightness: int
     color_temperature: int
+    packed: int
 
     OFF: ClassVar[LightSetting]
 
-    def __post_init__(self) -> None:
+    # Color temperatures fit in the low 16 bits, brightness goes above them
+    _BRIGHTNESS_SHIFT: ClassVar[int] = 16
+    _COLOR_TEMPERATURE_MASK: ClassVar[int] = (1 << _BRIGHTNESS_SHIFT) - 1
+
+    _pool: ClassVar[dict[int, LightSetting]] = {}
+
+    def __new__(cls, brightness: int, color_temperature: int) -> LightSetting:
+        assert isinstance(brightness, int) and isinstance(
+            color_temperature, int
+        ), f"Brightness {brightness!r} and color temperature {color_temperature!r} must be ints."
+
+        packed = (brightness << cls._BRIGHTNESS_SHIFT) | color_temperature
+
+        # Only an out of range color temperature can pack to the same value as
+        # a different setting, in which case the color temperatures differ
+        existing = cls._pool.get(packed)
+        if existing is not None and existing.color_temperature == color_temperature:
+            return existing
+
         assert (
-            0 <= self.brightness and self.brightness <= 100
-        ), f"Brightness {self.brightness} must be within the range [0, 100]."
+            0 <= brightness and brightness <= 100
+        ), f"Brightness {brightness} must be within the range [0, 100]."
 
         assert (
-            2000 <= self.color_temperature and self.color_temperature <= 6500
-        ), f"Color temperature {self.color_temperature}K must be within the range [2200K, 6500K]."
+            2000 <= color_temperature and color_temperature <= 6500
+        ), f"Color temperature {color_temperature}K must be within the range [2200K, 6500K]."
+
+        self = super().__new__(cls)
+        object.__setattr__(self, "brightness", brightness)
+        object.__setattr__(self, "color_temperature", color_temperature)
+        object.__setattr__(self, "packed", packed)
+
+        # setdefault so that racing threads still end up sharing one instance
+        return cls._pool.setdefault(packed, self)
+
+    @staticmethod
+    def from_packed(packed: int) -> LightSetting:
+        return LightSetting(
+            brightness=packed >> LightSetting._BRIGHTNESS_SHIFT,
+            color_temperature=packed & LightSetting._COLOR_TEMPERATURE_MASK,
+        )
 
     def with_brightness(self, new_brightness: int) -> LightSetting:
         return LightSetting(
             brightness=new_brightness, color_temperature=self.color_temperature
         )
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable.")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable.")
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, LightSetting):
+            return NotImplemented
+        return self.packed == other.packed
+
+    def __hash__(self) -> int:
+        return self.packed
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (LightSetting.from_packed, (self.packed,))
+
+    def __repr__(self) -> str:
+        return (
+            f"LightSetting(brightness={self.brightness}, "
+            f"color_temperature={self.color_temperature})"
+        )
+
 
 LightSetting.OFF = LightSetting(brightness=0, color_temperature=2200)
@@ -7,7 +7,7 @@ import re
 from typing import ClassVar, Optional
 
 from base_app import BaseApp
-from curve import current_curve_setting
+from curve import all_curve_settings, current_curve_setting
 from light_setting import LightSetting
 from switch import (
     HueDimmerSwitch,
@@ -55,7 +55,7 @@ class Light:
 class Fixture:
     lights: list[Light]
 
-    def set(self, app: BaseApp, setting: LightSetting) -> None:
+    def light_settings(self, setting: LightSetting) -> list[tuple[Light, LightSetting]]:
         # For very low settings, since lights can't go lower than 1% we can
         # try to emulate lower brightnesses by turning on a subset of the lights to 1%.
         # To make transitions across the boundary smoother we also re-scale
@@ -76,13 +76,18 @@ class Fixture:
             setting = setting.with_brightness(1)
 
             # Turn off unneeded lights
-            for light in self.lights[num_lights_to_set:]:
-                light.set(app, LightSetting.OFF)
+            lights_to_turn_off = self.lights[num_lights_to_set:]
         else:
             lights_to_set = self.lights
+            lights_to_turn_off = []
+
+        return [(light, LightSetting.OFF) for light in lights_to_turn_off] + [
+            (light, setting) for light in lights_to_set
+        ]
 
-        for light in lights_to_set:
-            light.set(app, setting)
+    def set(self, app: BaseApp, setting: LightSetting) -> None:
+        for light, light_setting in self.light_settings(setting):
+            light.set(app, light_setting)
 
 
 @dataclass(frozen=True)
@@ -93,9 +98,28 @@ class Room:
     minimum_brightness: Optional[int] = None
 
     @cached_property
-    def readable_name(self) -> str:
+    def _name(self) -> str:
         _, name = self.entity_id.split(".")
-        return name.replace("_", " ").title()
+        return name
+
+    @cached_property
+    def readable_name(self) -> str:
+        return self._name.replace("_", " ").title()
+
+    @cached_property
+    def num_lights(self) -> int:
+        return sum(len(fixture.lights) for fixture in self.fixtures)
+
+    @cached_property
+    def uses_low_brightness_scenes(self) -> bool:
+        # A scene only saves commands if it replaces more than one of them
+        return self.num_lights > 1
+
+    def _with_minimum_brightness(self, setting: LightSetting) -> LightSetting:
+        if self.minimum_brightness is None:
+            return setting
+
+        return setting.with_brightness(max(setting.brightness, self.minimum_brightness))
 
     def current_setting(self, app: BaseApp) -> LightSetting:
         switch_state = self.switch_sensor.get_state(app)
@@ -103,19 +127,56 @@ class Room:
         if switch_state != HueDimmerSwitch.State.DEFAULT:
             setting = setting.with_brightness(switch_state.to_brightness())
 
-        if self.minimum_brightness is not None:
-            setting = setting.with_brightness(
-                max(setting.brightness, self.minimum_brightness)
-            )
+        return self._with_minimum_brightness(setting)
+
+    def low_brightness_scene_id(self, setting: LightSetting) -> str:
+        return f"{self._name}_low_brightness_{setting.brightness}_{setting.color_temperature}k"
 
-        return setting
+    def sync_low_brightness_scene(self, app: BaseApp, setting: LightSetting) -> None:
+        app.create_scene(
+            self.low_brightness_scene_id(setting),
+            {
+                light.entity_id: light_setting
+                for fixture in self.fixtures
+                for light, light_setting in fixture.light_settings(setting)
+            },
+        )
 
-    def refresh(self, app: BaseApp) -> None:
+    def sync_low_brightness_scenes(self, app: BaseApp) -> None:
+        """
+        Precompiles a scene for every low brightness setting the curve can
+        put this room in, so that refreshing at those settings is a single
+        scene activation instead of one command per light
+        """
+        if not self.uses_low_brightness_scenes:
+            return
+
+        settings = {self._with_minimum_brightness(s) for s in all_curve_settings()}
+        for setting in settings:
+            if is_low_brightness(setting.brightness):
+                self.sync_low_brightness_scene(app, setting)
+
+    def refresh(self, app: BaseApp) -> int:
+        """
+        Returns the number of light commands saved by using a precompiled scene
+        """
         setting = self.current_setting(app)
 
         # For low brightnesses, we need to manually iterate over every fixture
         # to do the partial fixture illumination stuff
         if is_low_brightness(setting.brightness):
+            if self.uses_low_brightness_scenes:
+                scene_entity_id = f"scene.{self.low_brightness_scene_id(setting)}"
+                if app.entity_exists(scene_entity_id):
+                    app.activate_scene(scene_entity_id)
+                    return self.num_lights - 1
+
+                # Either this setting wasn't precompiled or the scene was lost
+                # when HA restarted, since created scenes aren't persisted.
+                # Fall back to per-light commands this time and create the
+                # scene for next time.
+                self.sync_low_brightness_scene(app, setting)
+
             for fixture in self.fixtures:
                 fixture.set(app, setting)
         # For normal brightnesses, we can directly set every fixture at once
@@ -125,14 +186,22 @@ class Room:
             )
             app.set_light(self.entity_id, setting)
 
+        return 0
+
 
 @dataclass(frozen=True)
 class Home:
     rooms: list[Room]
 
-    def refresh(self, app: BaseApp) -> None:
+    def sync_low_brightness_scenes(self, app: BaseApp) -> None:
         for room in self.rooms:
-            room.refresh(app)
+            room.sync_low_brightness_scenes(app)
+
+    def refresh(self, app: BaseApp) -> int:
+        """
+        Returns the number of light commands saved by using precompiled scenes
+        """
+        return sum(room.refresh(app) for room in self.rooms)
 
 
 # Light declarations
@@ -2,15 +2,17 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from functools import cached_property
+import time
 from typing import Any, Callable, Protocol
 
-from appdaemon.plugins.hass.hassapi import Hass
+from base_app import BaseApp
+from metrics_history import Series, metrics_registry
+
 
 # Workaround https://github.com/python/mypy/issues/5485 until the fix
 # gets info the next mypy release
 class CalculateFn(Protocol):
-    def __call__(self) -> Metric.Value:
-        ...
+    def __call__(self) -> Metric.Value: ...
 
 
 @dataclass(frozen=True)
@@ -28,16 +30,39 @@ class Metric:
         state: int
         extra_attributes: dict[str, int | str] = field(default_factory=dict)
 
-    def mk_update(self, app: Hass) -> Callable[[dict[str, Any]], None]:
+    def _series(self, value: Metric.Value) -> Series:
+        return Series(
+            name=self.name,
+            unit_of_measurement=self.unit_of_measurement,
+            labels=tuple(
+                sorted(
+                    (key, str(label)) for key, label in value.extra_attributes.items()
+                )
+            ),
+        )
+
+    def mk_update(
+        self, app: BaseApp, push_to_ha: bool = True
+    ) -> Callable[[dict[str, Any]], None]:
         def update(kwargs: dict[str, Any]) -> None:
-            value = self.calculate()
-            app.set_state(
-                self._entity_name,
-                state=value.state,
-                attributes={
-                    "unit_of_measurement": self.unit_of_measurement,
-                    **value.extra_attributes,
-                },
-            )
+            try:
+                value = self.calculate()
+
+                # History is kept in memory, so keep recording it even while
+                # HA is unavailable
+                metrics_registry.record(self._series(value), time.time(), value.state)
+
+                if push_to_ha and app.ha_available():
+                    app.set_state(
+                        self._entity_name,
+                        state=value.state,
+                        attributes={
+                            "unit_of_measurement": self.unit_of_measurement,
+                            **value.extra_attributes,
+                        },
+                    )
+            except:
+                app.notify_exception()
+                raise
 
         return update
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+
+@dataclass
+class RingBuffer:
+    """
+    Fixed capacity buffer of rows of floats, overwriting the oldest row once full
+    """
+
+    capacity: int
+    columns: int
+
+    _rows: np.ndarray = field(init=False)
+    _next: int = 0
+    _size: int = 0
+
+    def __post_init__(self) -> None:
+        self._rows = np.full((self.capacity, self.columns), np.nan)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, *row: float) -> None:
+        self._rows[self._next] = row
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def rows(self) -> np.ndarray:
+        """
+        A copy of every row, oldest first
+        """
+        if self._size < self.capacity:
+            return self._rows[: self._size].copy()
+
+        return np.roll(self._rows, -self._next, axis=0)
+
+    def last(self) -> Optional[np.ndarray]:
+        if self._size == 0:
+            return None
+
+        return self._rows[self._next - 1].copy()
+
+
+@dataclass
+class MetricHistory:
+    """
+    Keeps a day of samples at full resolution alongside a month of hourly
+    min/max/mean rollups, in a fixed amount of memory
+    """
+
+    raw_capacity: int = 24 * 60
+    rollup_capacity: int = 30 * 24
+    rollup_seconds: int = 60 * 60
+
+    # Rows of (timestamp, value)
+    raw: RingBuffer = field(init=False)
+    # Rows of (bucket start timestamp, min, max, mean)
+    rollups: RingBuffer = field(init=False)
+
+    _bucket_start: Optional[float] = None
+    _bucket_min: float = 0
+    _bucket_max: float = 0
+    _bucket_sum: float = 0
+    _bucket_count: int = 0
+
+    def __post_init__(self) -> None:
+        self.raw = RingBuffer(self.raw_capacity, 2)
+        self.rollups = RingBuffer(self.rollup_capacity, 4)
+
+    def record(self, timestamp: float, value: float) -> None:
+        bucket_start = timestamp - timestamp % self.rollup_seconds
+        if self._bucket_start != bucket_start:
+            self._close_bucket()
+            self._bucket_start = bucket_start
+            self._bucket_min = value
+            self._bucket_max = value
+            self._bucket_sum = 0
+            self._bucket_count = 0
+
+        self._bucket_min = min(self._bucket_min, value)
+        self._bucket_max = max(self._bucket_max, value)
+        self._bucket_sum += value
+        self._bucket_count += 1
+
+        self.raw.append(timestamp, value)
+
+    def _close_bucket(self) -> None:
+        if self._bucket_start is None or self._bucket_count == 0:
+            return
+
+        self.rollups.append(
+            self._bucket_start,
+            self._bucket_min,
+            self._bucket_max,
+            self._bucket_sum / self._bucket_count,
+        )
+
+
+@dataclass(frozen=True)
+class Series:
+    name: str
+    unit_of_measurement: str
+    labels: tuple[tuple[str, str], ...]
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels) + "}"
+
+
+@dataclass
+class MetricsRegistry:
+    _histories: dict[Series, MetricHistory] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def record(self, series: Series, timestamp: float, value: float) -> None:
+        with self._lock:
+            if series not in self._histories:
+                self._histories[series] = MetricHistory()
+            self._histories[series].record(timestamp, value)
+
+    def to_history_json(self, name: Optional[str] = None) -> str:
+        """
+        Exports the full raw and hourly history of every series, or just those
+        of the given metric, for dashboards to chart
+        """
+        with self._lock:
+            return json.dumps(
+                [
+                    {
+                        "name": series.name,
+                        "unit_of_measurement": series.unit_of_measurement,
+                        "labels": dict(series.labels),
+                        # Rows of [timestamp, value]
+                        "raw": history.raw.rows().tolist(),
+                        # Rows of [bucket start timestamp, min, max, mean]
+                        "hourly": history.rollups.rows().tolist(),
+                    }
+                    for series, history in self._histories.items()
+                    if name is None or series.name == name
+                ]
+            )
+
+    def to_prometheus(self) -> str:
+        """
+        Exports the latest sample and latest hourly rollup of every series in
+        the Prometheus text exposition format
+        """
+        # Prometheus requires all samples of a metric to be grouped together
+        families: dict[str, tuple[str, list[str]]] = {}
+
+        def add(name: str, help: str, labels: str, value: float) -> None:
+            if name not in families:
+                families[name] = (help, [])
+            families[name][1].append(f"{name}{labels} {value:.15g}")
+
+        with self._lock:
+            for series, history in sorted(
+                self._histories.items(), key=lambda item: item[0].name
+            ):
+                labels = _format_labels(series.labels)
+                unit = series.unit_of_measurement
+
+                last = history.raw.last()
+                if last is not None:
+                    _, value = last
+                    add(series.name, f"Latest value ({unit}).", labels, value)
+
+                rollup = history.rollups.last()
+                if rollup is not None:
+                    _, minimum, maximum, mean = rollup
+                    for stat, value in [
+                        ("min", minimum),
+                        ("max", maximum),
+                        ("mean", mean),
+                    ]:
+                        add(
+                            f"{series.name}_hourly_{stat}",
+                            f"{stat.title()} over the last complete hour ({unit}).",
+                            labels,
+                            value,
+                        )
+
+        lines = []
+        for name, (help, samples) in families.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(samples)
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        # Write then rename so scrapers never see a partially written file
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(temp_path, path)
+
+    def serve_prometheus(self, port: int) -> ThreadingHTTPServer:
+        """
+        Serves the Prometheus export at /metrics and the full history at
+        /history[?name=<metric>] on localhost from a background thread
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                if url.path == "/metrics":
+                    body = registry.to_prometheus()
+                    content_type = "text/plain; version=0.0.4"
+                elif url.path == "/history":
+                    names = parse_qs(url.query).get("name")
+                    body = registry.to_history_json(names[0] if names else None)
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+
+                encoded = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(encoded)))
+                self.end_headers()
+                self.wfile.write(encoded)
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+# Global modules are only loaded once, so this is shared by every app
+
+metrics_registry = MetricsRegistry()
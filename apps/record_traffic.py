@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+from base_app import BaseApp
+from traffic import TrafficRecord
+
+
+class RecordTraffic(BaseApp):
+    """
+    Appends incoming hue_events and switch state changes to a JSONL
+    recording, for replaying with replay_traffic.py
+    """
+
+    def initialize(self) -> None:
+        self._path: str = self.args["path"]
+        self._lock = threading.Lock()
+
+        self.listen_event(self.record_hue_event, "hue_event")
+        self.listen_state(self.record_state, "switch")
+
+    def record_hue_event(
+        self, event_name: str, data: dict[str, Any], kwargs: dict[str, Any]
+    ) -> None:
+        try:
+            self._append(TrafficRecord.hue_event(time.time(), data))
+        except:
+            self.notify_exception()
+            raise
+
+    def record_state(
+        self, entity: str, attribute: str, old: str, new: str, kwargs: dict[str, Any]
+    ) -> None:
+        try:
+            self._append(TrafficRecord.state(time.time(), entity, old, new))
+        except:
+            self.notify_exception()
+            raise
+
+    def _append(self, record: TrafficRecord) -> None:
+        with self._lock:
+            with open(self._path, "a") as f:
+                f.write(record.to_json() + "\n")
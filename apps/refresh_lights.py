@@ -11,12 +11,31 @@ from curve import current_curve_setting
 
 class RefreshLights(BaseApp):
     def initialize(self) -> None:
+        # Syncing every scene takes a few hundred service calls, so do it in
+        # the background rather than holding up app startup
+        self.run_in(self.sync_low_brightness_scenes, 0)
+
+        self.listen_ha_connection()
+
         self.run_minutely(self.refresh_lights_timer, time(second=0))
         self.listen_state(self.refresh_lights_switch, "switch")
 
+    def sync_low_brightness_scenes(self, kwargs: dict[str, Any]) -> None:
+        if not self.ha_available():
+            return
+
+        try:
+            home.sync_low_brightness_scenes(self)
+        except:
+            self.notify_exception()
+            raise
+
     def refresh_lights_timer(self, kwargs: dict[str, Any]) -> None:
+        if not self.ha_available():
+            return
+
         try:
-            home.refresh(self)
+            self._log_commands_saved(home.refresh(self))
         except:
             self.notify_exception()
             raise
@@ -24,11 +43,21 @@ class RefreshLights(BaseApp):
     def refresh_lights_switch(
         self, entity: str, attribute: str, old: str, new: str, kwargs: dict[str, Any]
     ) -> None:
+        if not self.ha_available():
+            return
+
         try:
             # Only refresh rooms controlled by the pressed switch
+            commands_saved = 0
             for room in home.rooms:
                 if room.switch_sensor.entity_id == entity:
-                    room.refresh(self)
+                    commands_saved += room.refresh(self)
+
+            self._log_commands_saved(commands_saved)
         except:
             self.notify_exception()
             raise
+
+    def _log_commands_saved(self, commands_saved: int) -> None:
+        if commands_saved > 0:
+            self.log(f"Low brightness scenes saved {commands_saved} light commands.")
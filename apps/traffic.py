@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import auto, unique
+import json
+import random
+from typing import Any, Iterable, Iterator, Sequence
+from uuid import NAMESPACE_OID, uuid5
+
+from switch import HueDimmerSwitch
+from util import StrEnum
+
+
+# The hue_event fields we parse into a hue_event.Event
+HUE_EVENT_FIELDS: tuple[str, ...] = ("id", "device_id", "unique_id", "type", "subtype")
+
+
+@dataclass(frozen=True)
+class TrafficRecord:
+    """
+    A single incoming hue_event or switch state change, as stored in a
+    JSONL recording
+    """
+
+    @unique
+    class Kind(StrEnum):
+        HUE_EVENT = auto()
+        STATE = auto()
+
+    # Seconds since the epoch
+    timestamp: float
+    kind: TrafficRecord.Kind
+    data: dict[str, Any]
+
+    @staticmethod
+    def hue_event(timestamp: float, data: dict[str, Any]) -> TrafficRecord:
+        # Only keep the fields we actually parse to keep recordings compact
+        return TrafficRecord(
+            timestamp=timestamp,
+            kind=TrafficRecord.Kind.HUE_EVENT,
+            data={key: data[key] for key in HUE_EVENT_FIELDS if key in data},
+        )
+
+    @staticmethod
+    def state(timestamp: float, entity_id: str, old: str, new: str) -> TrafficRecord:
+        return TrafficRecord(
+            timestamp=timestamp,
+            kind=TrafficRecord.Kind.STATE,
+            data={"entity_id": entity_id, "old": old, "new": new},
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {"t": round(self.timestamp, 3), "k": self.kind.value, "d": self.data},
+            separators=(",", ":"),
+        )
+
+    @staticmethod
+    def from_json(line: str) -> TrafficRecord:
+        raw = json.loads(line)
+        return TrafficRecord(
+            timestamp=raw["t"],
+            kind=TrafficRecord.Kind(raw["k"]),
+            data=raw["d"],
+        )
+
+
+def read_recording(path: str) -> list[TrafficRecord]:
+    with open(path) as f:
+        return [TrafficRecord.from_json(line) for line in f if line.strip()]
+
+
+def write_recording(path: str, records: Iterable[TrafficRecord]) -> None:
+    with open(path, "w") as f:
+        for record in records:
+            f.write(record.to_json() + "\n")
+
+
+def storm(
+    switches: Sequence[HueDimmerSwitch],
+    num_switches: int,
+    presses_per_second: float,
+    duration_seconds: float,
+    seed: int = 0,
+) -> Iterator[TrafficRecord]:
+    """
+    Generates synthetic hue_events for `num_switches` switches each being
+    pressed `presses_per_second` times a second. Since only a handful of
+    switches are declared, switches beyond those reuse the declared ones.
+    """
+    rng = random.Random(seed)
+    interval = 1 / presses_per_second
+    presses_per_switch = int(duration_seconds * presses_per_second)
+
+    for press in range(presses_per_switch):
+        for i in range(num_switches):
+            switch = switches[i % len(switches)]
+            button = rng.choice(list(HueDimmerSwitch.Button))
+            action = rng.choice(
+                [
+                    HueDimmerSwitch.ButtonAction.SHORT_RELEASE,
+                    HueDimmerSwitch.ButtonAction.LONG_RELEASE,
+                ]
+            )
+
+            # Stagger switches evenly within each press interval
+            yield TrafficRecord.hue_event(
+                timestamp=(press + i / num_switches) * interval,
+                data={
+                    "id": f"{switch.id}_button",
+                    "device_id": switch.id,
+                    "unique_id": str(uuid5(NAMESPACE_OID, f"{switch.id}_{button}")),
+                    "type": action.value.lower(),
+                    "subtype": button.value,
+                },
+            )
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import inspect
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "apps"))
+
+from error_reporting import CircuitBreaker, ExceptionReporter
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def assert_state(breaker: CircuitBreaker, expected: CircuitBreaker.State) -> None:
+    assert breaker.state == expected
+
+
+def mk_breaker(clock: FakeClock) -> CircuitBreaker:
+    return CircuitBreaker(
+        initial_backoff_seconds=60, max_backoff_seconds=240, clock=clock
+    )
+
+
+def test_closed_breaker_allows_without_probing() -> None:
+    def healthy() -> bool:
+        raise AssertionError("Should not probe a closed breaker")
+
+    assert mk_breaker(FakeClock()).allow_request(healthy)
+
+
+def test_trip_blocks_until_backoff_elapses() -> None:
+    clock = FakeClock()
+    breaker = mk_breaker(clock)
+
+    assert breaker.trip()
+    assert not breaker.trip()
+    assert_state(breaker, CircuitBreaker.State.OPEN)
+
+    clock.now = 59
+    assert not breaker.allow_request(lambda: True)
+
+    clock.now = 60
+    assert breaker.allow_request(lambda: True)
+    assert_state(breaker, CircuitBreaker.State.CLOSED)
+
+
+def test_failed_probes_double_backoff_up_to_max() -> None:
+    clock = FakeClock()
+    breaker = mk_breaker(clock)
+    breaker.trip()
+
+    for expected_backoff in [120, 240, 240]:
+        clock.now += breaker.backoff_seconds
+        assert not breaker.allow_request(lambda: False)
+        assert_state(breaker, CircuitBreaker.State.OPEN)
+        assert breaker.backoff_seconds == expected_backoff
+
+    # Still waiting on the latest backoff
+    clock.now += 239
+    assert not breaker.allow_request(lambda: True)
+
+    clock.now += 1
+    assert breaker.allow_request(lambda: True)
+    assert_state(breaker, CircuitBreaker.State.CLOSED)
+
+    # Backoff starts over after recovering
+    breaker.trip()
+    assert breaker.backoff_seconds == 60
+
+
+def test_raising_probe_counts_as_failure() -> None:
+    clock = FakeClock()
+    breaker = mk_breaker(clock)
+    breaker.trip()
+    clock.now = 60
+
+    def healthy() -> bool:
+        raise RuntimeError()
+
+    with pytest.raises(RuntimeError):
+        breaker.allow_request(healthy)
+
+    assert_state(breaker, CircuitBreaker.State.OPEN)
+    assert breaker.backoff_seconds == 120
+
+
+def test_exception_reporter_deduplicates_within_window() -> None:
+    clock = FakeClock()
+    reporter = ExceptionReporter(window_seconds=60, clock=clock)
+
+    assert reporter.should_report("a") == 0
+    assert reporter.should_report("b") == 0
+    assert reporter.should_report("a") is None
+    assert reporter.should_report("a") is None
+
+    clock.now = 60
+    assert reporter.should_report("a") == 2
+    assert reporter.should_report("a") is None
+
+
+def test_appdaemon_fires_plugin_connection_events() -> None:
+    """
+    The breaker relies on these events, since AppDaemon's set_state returns
+    the locally built state and service calls return nothing, even when HA
+    is unreachable
+    """
+    plugin_management = pytest.importorskip("appdaemon.plugin_management")
+    plugins = plugin_management.Plugins
+
+    assert '"plugin_stopped"' in inspect.getsource(plugins.notify_plugin_stopped)
+    assert '"plugin_started"' in inspect.getsource(plugins.notify_plugin_started)
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "apps"))
+
+from metrics_history import MetricHistory, MetricsRegistry, RingBuffer, Series
+
+
+def test_ring_buffer_keeps_latest_rows_in_order() -> None:
+    buffer = RingBuffer(capacity=3, columns=1)
+    for i in range(5):
+        buffer.append(i)
+
+    assert len(buffer) == 3
+    assert buffer.rows().ravel().tolist() == [2, 3, 4]
+
+
+def test_history_rolls_up_complete_buckets() -> None:
+    history = MetricHistory(raw_capacity=4, rollup_seconds=60)
+    for timestamp, value in [(0, 1), (30, 3), (60, 10), (90, 20), (120, 5)]:
+        history.record(timestamp, value)
+
+    assert history.raw.rows().tolist() == [[30, 3], [60, 10], [90, 20], [120, 5]]
+    # The bucket starting at 120 isn't complete yet
+    assert history.rollups.rows().tolist() == [[0, 1, 3, 2], [60, 10, 20, 15]]
+
+
+def test_history_json_filters_by_name() -> None:
+    registry = MetricsRegistry()
+    registry.record(Series("brightness", "%", (("source", "Bedroom"),)), 0, 50)
+    registry.record(Series("color_temperature", "K", ()), 0, 2200)
+
+    [series] = json.loads(registry.to_history_json("brightness"))
+    assert series["labels"] == {"source": "Bedroom"}
+    assert series["raw"] == [[0, 50]]
+    assert series["hourly"] == []
+
+    assert len(json.loads(registry.to_history_json())) == 2
@@ -0,0 +1,147 @@
+"""
+Compares the time and memory taken by the interned LightSetting against the
+frozen dataclass it replaced, over a day of the settings each minutely
+refresh computes for every room.
+
+    python tools/bench_light_setting.py
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import time as dt_time
+import os
+import sys
+import time
+import tracemalloc
+from typing import Iterator, Protocol, Sequence
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "apps"))
+
+from base_app import BaseApp
+import curve
+from lights import home, is_low_brightness, rescale_normal_brightness
+from replay_traffic import SimulatedHass, SimulatedHomeAssistant
+from switch import ALL_SWITCHES, HueDimmerSwitch, bedroom_dimmer_switch
+
+
+@dataclass(frozen=True)
+class DataclassLightSetting:
+    brightness: int
+    color_temperature: int
+
+    def __post_init__(self) -> None:
+        assert (
+            0 <= self.brightness and self.brightness <= 100
+        ), f"Brightness {self.brightness} must be within the range [0, 100]."
+
+        assert (
+            2000 <= self.color_temperature and self.color_temperature <= 6500
+        ), f"Color temperature {self.color_temperature}K must be within the range [2200K, 6500K]."
+
+    def with_brightness(self, new_brightness: int) -> DataclassLightSetting:
+        return DataclassLightSetting(
+            brightness=new_brightness, color_temperature=self.color_temperature
+        )
+
+
+class Setting(Protocol):
+    @property
+    def brightness(self) -> int:
+        ...
+
+    @property
+    def color_temperature(self) -> int:
+        ...
+
+    def with_brightness(self, new_brightness: int) -> Setting:
+        ...
+
+
+class BenchApp(SimulatedHass, BaseApp):
+    pass
+
+
+@contextmanager
+def curve_table(table: Sequence[Setting]) -> Iterator[None]:
+    """
+    Swaps in a different curve table, so that Room.current_setting builds on
+    settings of the given implementation
+    """
+    original = curve.curve_table
+    curve.curve_table = table  # type: ignore[assignment]
+    try:
+        yield
+    finally:
+        curve.curve_table = original
+
+
+def simulate_day(app: BenchApp, ha: SimulatedHomeAssistant) -> list[Setting]:
+    """
+    Computes each room's setting the way Room.refresh does for every minute
+    of the day, comparing it against the previous minute's as command
+    de-duplication would. Returns the final setting for every room and minute.
+    """
+    settings: list[Setting] = []
+    previous: dict[str, Setting] = {}
+    for minutes in range(24 * 60):
+        ha.now = dt_time(minutes // 60, minutes % 60)
+        for room in home.rooms:
+            setting: Setting = room.current_setting(app)
+            if not is_low_brightness(setting.brightness):
+                setting = setting.with_brightness(
+                    rescale_normal_brightness(setting.brightness)
+                )
+
+            if previous.get(room.entity_id) != setting:
+                previous[room.entity_id] = setting
+            settings.append(setting)
+
+    return settings
+
+
+def benchmark(name: str, table: Sequence[Setting]) -> None:
+    ha = SimulatedHomeAssistant(now=None)
+    for switch in ALL_SWITCHES:
+        ha.states[switch.sensor.entity_id] = switch.sensor.default_state
+    # Exercise switch overrides as well as the curve
+    ha.states[bedroom_dimmer_switch.sensor.entity_id] = HueDimmerSwitch.State.HALF_ON
+    app = BenchApp(ha)
+
+    repeats = 20
+
+    with curve_table(table):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            simulate_day(app, ha)
+        elapsed_ms = (time.perf_counter() - start) / repeats * 1000
+
+        tracemalloc.start()
+        settings = simulate_day(app, ha)
+        retained_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    unique_instances = len({id(setting) for setting in settings})
+    print(
+        f"{name}: {elapsed_ms:.1f}ms per simulated day, "
+        f"{unique_instances} instances for {len(settings)} settings, "
+        f"{retained_bytes / 1024:.0f}KiB retained, {peak_bytes / 1024:.0f}KiB peak"
+    )
+
+
+def main() -> None:
+    benchmark(
+        "dataclass",
+        [
+            DataclassLightSetting(setting.brightness, setting.color_temperature)
+            for setting in curve.curve_table
+        ],
+    )
+    # As at runtime, the pool already holds every curve setting from building
+    # the curve table, so this measures the steady state
+    benchmark("interned", curve.curve_table)
+
+
+if __name__ == "__main__":
+    main()
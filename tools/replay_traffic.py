@@ -0,0 +1,335 @@
+"""
+Replays recorded (or synthetic) hue_event and switch state traffic into the
+ProcessSwitchEvents and RefreshLights apps, running against an in-memory
+stand-in for HA, and reports how quickly and reliably light commands follow.
+
+    python tools/replay_traffic.py --recording traffic.jsonl --speed 10
+    python tools/replay_traffic.py --storm 3x5 --duration 10 --at 23:30
+
+Recorded state changes are only applied if the switch isn't already in the
+new state, since most of them were caused by a recorded hue_event which
+will have already been replayed.
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import defaultdict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, time as dt_time
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "apps"))
+
+from process_switch_events import ProcessSwitchEvents
+from refresh_lights import RefreshLights
+from switch import ALL_SWITCHES
+from traffic import TrafficRecord, read_recording, storm, write_recording
+
+
+@dataclass(frozen=True)
+class Command:
+    # Index of the replayed record which (transitively) caused this command
+    cause: Optional[int]
+    timestamp: float
+    service: str
+    entity_id: str
+
+
+class SimulatedHomeAssistant:
+    """
+    Just enough of HA and AppDaemon's scheduling to run our apps. As with
+    AppDaemon's default of pinning apps to threads, each app's callbacks run
+    sequentially on that app's own thread.
+    """
+
+    def __init__(self, now: Optional[dt_time]) -> None:
+        self.now = now
+        self.states: dict[str, Any] = {}
+        self.commands: list[Command] = []
+        self.notifications: list[str] = []
+        self.errors: dict[Optional[int], str] = {}
+        # Causes which changed a switch's state, and so should cause commands
+        self.state_changes: set[Optional[int]] = set()
+
+        self._lock = threading.RLock()
+        self._executors: dict[str, Executor] = {}
+        self._event_listeners: dict[str, list[tuple[str, Callable[..., None]]]] = (
+            defaultdict(list)
+        )
+        self._state_listeners: list[tuple[str, str, Callable[..., None]]] = []
+        self._cause = threading.local()
+        self._in_flight = 0
+        self._idle = threading.Condition(self._lock)
+
+    def listen_event(self, app: str, callback: Callable[..., None], event: str) -> None:
+        self._event_listeners[event].append((app, callback))
+
+    def listen_state(
+        self, app: str, callback: Callable[..., None], entity: str
+    ) -> None:
+        self._state_listeners.append((app, entity, callback))
+
+    def fire_event(self, event: str, data: dict[str, Any], cause: int) -> None:
+        for app, callback in self._event_listeners[event]:
+            self._submit(app, cause, callback, event, data, {})
+
+    def get_state(self, entity_id: str) -> Any:
+        with self._lock:
+            return self.states.get(entity_id)
+
+    def set_state(self, entity_id: str, state: Any, cause: Optional[int]) -> None:
+        with self._lock:
+            old = self.states.get(entity_id)
+            self.states[entity_id] = state
+            if old == state:
+                return
+
+            for app, entity, callback in self._state_listeners:
+                if entity_id == entity or entity_id.startswith(f"{entity}."):
+                    self.state_changes.add(cause)
+                    self._submit(
+                        app, cause, callback, entity_id, "state", old, state, {}
+                    )
+
+    def notify(self, message: str) -> None:
+        with self._lock:
+            self.notifications.append(message)
+
+    def command(self, service: str, entity_id: str) -> None:
+        with self._lock:
+            self.commands.append(
+                Command(self.current_cause, time.perf_counter(), service, entity_id)
+            )
+
+    @property
+    def current_cause(self) -> Optional[int]:
+        return getattr(self._cause, "value", None)
+
+    def wait_until_idle(self) -> None:
+        with self._idle:
+            self._idle.wait_for(lambda: self._in_flight == 0)
+
+    def shutdown(self) -> None:
+        for executor in self._executors.values():
+            executor.shutdown()
+
+    def _submit(
+        self, app: str, cause: Optional[int], callback: Callable[..., None], *args: Any
+    ) -> None:
+        def run() -> None:
+            self._cause.value = cause
+            try:
+                callback(*args)
+            except Exception as e:
+                with self._lock:
+                    self.errors[cause] = repr(e)
+            finally:
+                with self._idle:
+                    self._in_flight -= 1
+                    self._idle.notify_all()
+
+        with self._lock:
+            self._in_flight += 1
+            if app not in self._executors:
+                self._executors[app] = ThreadPoolExecutor(max_workers=1)
+            self._executors[app].submit(run)
+
+
+class SimulatedHass:
+    """
+    Overrides the parts of the Hass API our apps use to talk to a
+    SimulatedHomeAssistant instead. Must come before the app in the MRO.
+    """
+
+    def __init__(self, ha: SimulatedHomeAssistant) -> None:
+        self._ha = ha
+        self.args: dict[str, Any] = {}
+
+    @property
+    def _app_name(self) -> str:
+        return type(self).__name__
+
+    def listen_event(self, callback: Callable[..., None], event: str) -> None:
+        self._ha.listen_event(self._app_name, callback, event)
+
+    def listen_state(self, callback: Callable[..., None], entity: str) -> None:
+        self._ha.listen_state(self._app_name, callback, entity)
+
+    def run_minutely(self, callback: Callable[..., None], start: dt_time) -> None:
+        # Timers aren't replayed, only the recorded traffic is
+        pass
+
+    def run_in(self, callback: Callable[..., None], delay: int) -> None:
+        # Delayed startup work needs to have happened before replaying
+        callback({})
+
+    def get_state(self, entity_id: str) -> Any:
+        return self._ha.get_state(entity_id)
+
+    def set_state(self, entity_id: str, state: Any, **kwargs: Any) -> None:
+        self._ha.set_state(entity_id, state, self._ha.current_cause)
+
+    def entity_exists(self, entity_id: str) -> bool:
+        return self._ha.get_state(entity_id) is not None
+
+    def turn_on(self, entity_id: str, **kwargs: Any) -> None:
+        self._ha.command("turn_on", entity_id)
+
+    def turn_off(self, entity_id: str, **kwargs: Any) -> None:
+        self._ha.command("turn_off", entity_id)
+
+    def call_service(self, service: str, **kwargs: Any) -> None:
+        if service == "scene/create":
+            self._ha.set_state(f"scene.{kwargs['scene_id']}", "scening", None)
+        self._ha.command(service, kwargs.get("entity_id", ""))
+
+    def time(self) -> dt_time:
+        return self._ha.now or datetime.now().time()
+
+    def log(self, msg: str, level: str = "INFO") -> None:
+        pass
+
+    def notify(self, message: str) -> None:
+        self._ha.notify(message)
+
+
+class SimulatedProcessSwitchEvents(SimulatedHass, ProcessSwitchEvents):
+    pass
+
+
+class SimulatedRefreshLights(SimulatedHass, RefreshLights):
+    pass
+
+
+def replay(
+    records: list[TrafficRecord], speed: float, now: Optional[dt_time]
+) -> SimulatedHomeAssistant:
+    ha = SimulatedHomeAssistant(now)
+    for switch in ALL_SWITCHES:
+        ha.states[switch.sensor.entity_id] = switch.sensor.default_state
+
+    SimulatedProcessSwitchEvents(ha).initialize()
+    SimulatedRefreshLights(ha).initialize()
+    ha.wait_until_idle()
+    ha.commands.clear()
+
+    records = sorted(records, key=lambda record: record.timestamp)
+    first_timestamp = records[0].timestamp if records else 0.0
+    start = time.perf_counter()
+    fired_at: dict[int, float] = {}
+
+    for i, record in enumerate(records):
+        delay = start + (record.timestamp - first_timestamp) / speed
+        time.sleep(max(0.0, delay - time.perf_counter()))
+
+        fired_at[i] = time.perf_counter()
+        if record.kind == TrafficRecord.Kind.HUE_EVENT:
+            ha.fire_event("hue_event", record.data, cause=i)
+        elif ha.get_state(record.data["entity_id"]) != record.data["new"]:
+            ha.set_state(record.data["entity_id"], record.data["new"], cause=i)
+
+    ha.wait_until_idle()
+    ha.shutdown()
+
+    report(records, fired_at, ha)
+    return ha
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def report(
+    records: list[TrafficRecord], fired_at: dict[int, float], ha: SimulatedHomeAssistant
+) -> None:
+    last_command_at: dict[int, float] = {}
+    for command in ha.commands:
+        if command.cause is not None:
+            last_command_at[command.cause] = command.timestamp
+
+    # Time until every light affected by an event has been sent its command
+    latencies_ms = sorted(
+        (last_command_at[cause] - fired_at[cause]) * 1000 for cause in last_command_at
+    )
+
+    # Switch state changes which never resulted in a command
+    dropped = {
+        cause
+        for cause in ha.state_changes
+        if cause is not None and cause not in last_command_at
+    }
+
+    # Commands to a light arriving after one caused by a later event
+    out_of_order = 0
+    latest_cause: dict[str, int] = {}
+    for command in ha.commands:
+        if command.cause is None:
+            continue
+        if command.cause < latest_cause.get(command.entity_id, -1):
+            out_of_order += 1
+        latest_cause[command.entity_id] = max(
+            command.cause, latest_cause.get(command.entity_id, -1)
+        )
+
+    print(f"Replayed {len(records)} records, producing {len(ha.commands)} commands.")
+    if latencies_ms:
+        print(
+            "Event to command latency (ms): "
+            + ", ".join(f"p{p}={percentile(latencies_ms, p):.1f}" for p in [50, 90, 99])
+            + f", max={latencies_ms[-1]:.1f}"
+        )
+    print(f"Dropped: {len(dropped)} of {len(ha.state_changes)} switch state changes.")
+    print(f"Out of order commands: {out_of_order}.")
+    print(f"Callback errors: {len(ha.errors)}.")
+    print(f"Notifications: {len(ha.notifications)}.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Replays hue_event and switch state traffic into the apps."
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--recording", help="JSONL recording to replay")
+    source.add_argument(
+        "--storm",
+        metavar="NxM",
+        help="Synthetic storm of N switches each pressed M times a second",
+    )
+    parser.add_argument("--duration", type=float, default=10, help="Storm seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Storm random seed")
+    parser.add_argument("--save", help="Also write the storm out as a recording")
+    parser.add_argument("--speed", type=float, default=1, help="e.g. 1, 10 or 100")
+    parser.add_argument(
+        "--at", help="Time of day HH:MM to evaluate the curve at, defaults to now"
+    )
+    args = parser.parse_args()
+
+    if args.recording is not None:
+        records = read_recording(args.recording)
+    else:
+        num_switches, presses_per_second = args.storm.split("x")
+        records = list(
+            storm(
+                ALL_SWITCHES,
+                int(num_switches),
+                float(presses_per_second),
+                args.duration,
+                args.seed,
+            )
+        )
+        if args.save is not None:
+            write_recording(args.save, records)
+
+    now = dt_time.fromisoformat(args.at) if args.at is not None else None
+    replay(records, args.speed, now)
+
+
+if __name__ == "__main__":
+    main()